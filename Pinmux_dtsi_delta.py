@@ -7,19 +7,23 @@ Designed to work with output from gen_pinmux_dt_from_xlsx.py, preserving
 the leading "/* Pin # - Signal Name */" comments from the AFTER file.
 """
 
+import hashlib
 import re
+import string
 import argparse
 from pathlib import Path
 
 
 # Helpers to isolate the `common { ... }` section
 
+_COMMON_RE = re.compile(r'\bcommon\s*\{')
+
 def extract_common_section(text: str) -> str:
     """
     Extract the body of the first `common { ... }` section, excluding
     the outer braces themselves.
     """
-    m = re.search(r'\bcommon\s*\{', text)
+    m = _COMMON_RE.search(text)
     if not m:
         return ""
     # Position of the '{' that opens "common {"
@@ -27,18 +31,24 @@ def extract_common_section(text: str) -> str:
     if start_brace == -1:
         return ""
 
-    depth = 0
+    depth = 1
     start_inner = start_brace + 1
     end_inner = None
 
-    for i, ch in enumerate(text[start_brace:], start=start_brace):
-        if ch == "{":
+    # Hop between braces with str.find rather than stepping per character;
+    # only the position that was consumed is searched again.
+    next_open = text.find("{", start_inner)
+    next_close = text.find("}", start_inner)
+    while next_close != -1:
+        if next_open != -1 and next_open < next_close:
             depth += 1
-        elif ch == "}":
+            next_open = text.find("{", next_open + 1)
+        else:
             depth -= 1
             if depth == 0:
-                end_inner = i
+                end_inner = next_close
                 break
+            next_close = text.find("}", next_close + 1)
 
     if end_inner is None or end_inner <= start_inner:
         return ""
@@ -49,6 +59,14 @@ def extract_common_section(text: str) -> str:
 
 # Parse pin blocks + optional preceding "/* Pin .. */" comments
 
+# Characters allowed in a pin node name
+_PIN_NAME_CHARS = string.ascii_letters + string.digits + "_"
+
+# Comment-only lines plus leading/trailing whitespace on every line
+_NORM_RE = re.compile(r'^[ \t]*/\*.*?\*/[ \t]*\n|^[ \t]+|[ \t]+$', re.M)
+_WS_RE = re.compile(r'\s+')
+
+
 def parse_pin_blocks_with_comments(common_body: str):
     """
     Parse `common_body` (inner text of the common { ... } section) into
@@ -62,68 +80,103 @@ def parse_pin_blocks_with_comments(common_body: str):
         \t\t\t};
 
     Returns:
-        dict[pin_name] = (block_text, normalized_text_for_compare)
+        dict[pin_name] = ((start, end), (len, head, tail, digest) of normalized text)
+
+    The block text itself is not kept; slice common_body[start:end] for
+    the pins that are needed.
     """
     blocks = {}
     if not common_body:
         return blocks
 
-    lines = common_body.splitlines()
-    comment_re = re.compile(r'^\s*/\*.*\*/\s*$')
-    pin_re = re.compile(r'^\s*([A-Za-z0-9_]+)\s*\{')
-
-    pending_comment_idx = None
-    i = 0
-    while i < len(lines):
-        line = lines[i]
+    find = common_body.find
+    rfind = common_body.rfind
+    body_len = len(common_body)
 
-        # Track possible "/* Pin ... */" comment
-        if comment_re.match(line):
-            pending_comment_idx = i
-            i += 1
-            continue
-
-        m = pin_re.match(line)
-        if not m:
-            i += 1
-            continue
+    pending_comment_start = None
+    block_start = None
+    pin = None
+    depth = 0
 
-        pin = m.group(1)
-        # Start of block: include comment if immediately preceding (or last seen)
-        start_idx = pending_comment_idx if pending_comment_idx is not None else i
+    # Hop between "/*", "{" and "}" with str.find; comments are skipped as
+    # a whole so braces inside them are ignored.
+    next_comment = find("/*")
+    next_open = find("{")
+    next_close = find("}")
 
-        # Find end of block by brace balancing
-        depth = 0
-        j = i
-        while j < len(lines):
-            depth += lines[j].count("{")
-            depth -= lines[j].count("}")
-            if depth == 0:
-                end_idx = j
-                break
-            j += 1
-        else:
-            # Unterminated block; stop parsing
+    while True:
+        pos = min(p for p in (next_comment, next_open, next_close, body_len) if p != -1)
+        if pos == body_len:
             break
 
-        block_lines = lines[start_idx:end_idx + 1]
-        block_text = "\n".join(block_lines)
+        if pos == next_comment:
+            comment_end = find("*/", pos + 2)
+            if comment_end == -1:
+                break
+            comment_end += 2
 
-        # Build a normalized version for comparison:
-        # - strip leading/trailing spaces on each line
-        # - drop the "/* Pin ... */" comment line from the normalization
-        norm_lines = []
-        for l in block_lines:
-            if comment_re.match(l):
-                continue
-            norm_lines.append(l.strip())
-        norm_text = " ".join(norm_lines)
+            # Track possible "/* Pin ... */" comment (alone on its line)
+            if depth == 0:
+                line_start = rfind("\n", 0, pos) + 1
+                line_end = find("\n", comment_end)
+                if line_end == -1:
+                    line_end = body_len
+                if (not common_body[line_start:pos].strip(" \t")
+                        and not common_body[comment_end:line_end].strip(" \t")):
+                    pending_comment_start = line_start
+
+            next_comment = find("/*", comment_end)
+            if -1 < next_open < comment_end:
+                next_open = find("{", comment_end)
+            if -1 < next_close < comment_end:
+                next_close = find("}", comment_end)
+            continue
 
-        blocks[pin] = (block_text, norm_text)
+        if pos == next_open:
+            if depth == 0:
+                # Pin opener: "<name> {" with only whitespace before the name
+                line_start = rfind("\n", 0, pos) + 1
+                name = common_body[line_start:pos].strip(" \t")
+                if name and not name.strip(_PIN_NAME_CHARS):
+                    pin = name
+                    # Start of block: include comment if immediately preceding (or last seen)
+                    block_start = (pending_comment_start
+                                   if pending_comment_start is not None else line_start)
+            depth += 1
+            next_open = find("{", pos + 1)
+            continue
 
-        # Reset pending comment; move past this block
-        pending_comment_idx = None
-        i = end_idx + 1
+        # Closing brace
+        next_close = find("}", pos + 1)
+        if depth == 0:
+            continue
+        depth -= 1
+        if depth == 0 and pin is not None:
+            # Block runs to the end of the line holding its closing brace
+            block_end = find("\n", pos + 1)
+            if block_end == -1:
+                block_end = body_len
+            block_text = common_body[block_start:block_end]
+
+            # Build a normalized version for comparison:
+            # - drop the "/* Pin ... */" comment line from the normalization
+            # - strip leading/trailing spaces on each line
+            # - collapse remaining whitespace runs to one space
+            # - keep only its length, first/last 64 chars and a 16-byte
+            #   digest; tuple compare checks the cheap fields first
+            norm_text = _WS_RE.sub(" ", _NORM_RE.sub("", block_text))
+            norm_key = (
+                len(norm_text),
+                norm_text[:64],
+                norm_text[-64:],
+                hashlib.blake2b(norm_text.encode("utf-8"), digest_size=16).digest(),
+            )
+
+            blocks[pin] = ((block_start, block_end), norm_key)
+
+            # Reset pending comment; move past this block
+            pending_comment_start = None
+            pin = None
 
     return blocks
 
@@ -131,10 +184,13 @@ def parse_pin_blocks_with_comments(common_body: str):
 
 # Main delta computation
 
-def build_delta_common(before_text: str, after_text: str) -> str:
+def write_delta_common(out_fp, before_text: str, after_text: str) -> int:
     """
-    Build the delta `common { ... }` section containing only changed pins,
-    preserving comments from AFTER.
+    Write the delta `common { ... }` section containing only changed pins,
+    preserving comments from AFTER, to out_fp.
+
+    Pin blocks are written one at a time. Nothing is written when no pin
+    changed. Returns the number of changed pins.
     """
     before_body = extract_common_section(before_text)
     after_body = extract_common_section(after_text)
@@ -142,49 +198,39 @@ def build_delta_common(before_text: str, after_text: str) -> str:
     before_blocks = parse_pin_blocks_with_comments(before_body)
     after_blocks = parse_pin_blocks_with_comments(after_body)
 
-    changed_pins = []
-
-    all_pins = sorted(set(before_blocks.keys()) | set(after_blocks.keys()))
-    for pin in all_pins:
-        b = before_blocks.get(pin)
-        a = after_blocks.get(pin)
-
-        if a is None:
-            # Pin removed in AFTER; typically ignore removals for overlays
-            continue
-
-        if b is None:
-            # New pin in AFTER
-            changed_pins.append(pin)
-            continue
-
-        # Compare normalized bodies (excluding pin comment differences)
-        if a[1] != b[1]:
-            changed_pins.append(pin)
+    # Only AFTER's pins are walked: pins removed in AFTER are ignored for
+    # overlays, and pins new in AFTER have no BEFORE key so they differ.
+    # Normalized body keys exclude pin comment differences.
+    before_keys = {pin: key for pin, (_, key) in before_blocks.items()}
+    changed_pins = sorted(
+        pin for pin, (_, key) in after_blocks.items()
+        if before_keys.get(pin) != key
+    )
 
     if not changed_pins:
-        return ""
+        return 0
 
-    lines = []
+    write = out_fp.write
     T2 = "\t" * 2
     T3 = "\t" * 3
 
-    lines.append(f"{T2}/* Auto-generated: delta of changed pins only */")
-    lines.append(f"{T2}common {{")
-    lines.append(f"{T3}/* Only pins that changed vs. BEFORE */")
+    write(f"{T2}/* Auto-generated: delta of changed pins only */\n")
+    write(f"{T2}common {{\n")
+    write(f"{T3}/* Only pins that changed vs. BEFORE */\n")
 
     first = True
     for pin in changed_pins:
-        block_text = after_blocks[pin][0]  # includes /* Pin ... */ comment from AFTER
+        start, end = after_blocks[pin][0]
+        block_text = after_body[start:end]  # includes /* Pin ... */ comment from AFTER
         if not first:
-            lines.append("")  # blank line between blocks
+            write("\n")  # blank line between blocks
         first = False
-        lines.append(block_text.rstrip())
+        write(block_text.rstrip())
+        write("\n")
 
-    lines.append(f"{T2}}};")
-    lines.append("")
+    write(f"{T2}}};\n")
 
-    return "\n".join(lines)
+    return len(changed_pins)
 
 
 def main():
@@ -199,12 +245,11 @@ def main():
     before_text = Path(args.before).read_text(encoding="utf-8")
     after_text = Path(args.after).read_text(encoding="utf-8")
 
-    delta_common = build_delta_common(before_text, after_text)
-
     out_path = Path(args.out)
-    out_path.write_text(delta_common, encoding="utf-8")
+    with out_path.open("w", encoding="utf-8", buffering=1 << 20) as out_fp:
+        n_changed = write_delta_common(out_fp, before_text, after_text)
 
-    if delta_common.strip():
+    if n_changed:
         print(f"Wrote {out_path}")
     else:
         print("No pinmux differences detected (no changes to common{} pin blocks).")
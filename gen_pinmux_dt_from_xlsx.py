@@ -20,9 +20,17 @@ Only AS–AX are used to derive config bits; BD–BI, BK, etc. are ignored.
 """
 
 import argparse
+import collections
+import functools
+import io
 import re
-import xml.etree.ElementTree as ET
+import string
+import sys
 from pathlib import Path
+import xml.etree.ElementTree as ET
+from xml.parsers import expat
+import xml.sax
+import xml.sax.handler
 import zipfile
 
 
@@ -52,208 +60,191 @@ DOUBLE_TAB = TAB * 2
 TRIPLE_TAB = TAB * 3
 QUAD_TAB = TAB * 4
 
+# One pin block; {comment} and {config} carry the optional comment line
+# and the config-derived property lines, each already newline-terminated.
+PIN_TMPL = (
+    "{comment}"
+    f"{TRIPLE_TAB}{{pin}} {{{{\n"
+    f'{QUAD_TAB}nvidia,pins = "{{pin}}";\n'
+    f'{QUAD_TAB}nvidia,function = "{{func}}";\n'
+    "{config}"
+    f"{TRIPLE_TAB}}}}};\n"
+)
+
+# Property lines that depend only on the ConfigBits mask; {extra} carries
+# the optional ones.
+CONFIG_TMPL = (
+    f"{QUAD_TAB}nvidia,pull = <{{pull}}>;\n"
+    f"{QUAD_TAB}nvidia,tristate = <{{tri}}>;\n"
+    f"{QUAD_TAB}nvidia,enable-input = <{{ein}}>;\n"
+    f"{QUAD_TAB}nvidia,drv-type = <{{lpdr}}>;\n"
+    "{extra}"
+)
+
+
+# Field values indexed by the 2-bit pull / drive-type fields
+PULL_NAMES = (
+    "TEGRA_PIN_PULL_NONE",
+    "TEGRA_PIN_PULL_DOWN",
+    "TEGRA_PIN_PULL_UP",
+    str(ERR_PULL),
+)
+LPDR_NAMES = (
+    "TEGRA_PIN_1X_DRIVER",
+    "TEGRA_PIN_2X_DRIVER",
+    "TEGRA_PIN_DEFAULT_DRIVE_1X",
+    "TEGRA_PIN_DEFAULT_DRIVE_2X",
+)
+PULL_SHIFT = CFG_PULL_DOWN.bit_length() - 1
+LPDR_SHIFT = CFG_DRV_1X.bit_length() - 1
+
+
+def _enable(config_bits: int, flag: int) -> str:
+    return "TEGRA_PIN_ENABLE" if config_bits & flag else "TEGRA_PIN_DISABLE"
 
-def get_pull(config_bits: int) -> str:
-    checker = config_bits & (CFG_PULL_UP | CFG_PULL_DOWN)
-    checker = (checker // CFG_PULL_DOWN) % 4
-    if checker > 2:
-        checker = ERR_PULL
 
-    if checker == 0:
-        return "TEGRA_PIN_PULL_NONE"
-    elif checker == 1:
-        return "TEGRA_PIN_PULL_DOWN"
-    elif checker == 2:
-        return "TEGRA_PIN_PULL_UP"
-    else:
-        return str(checker)
+def get_pull(config_bits: int) -> str:
+    return PULL_NAMES[(config_bits >> PULL_SHIFT) & 3]
 
 
 def get_tristate(config_bits: int) -> str:
-    checker = config_bits & CFG_TRISTATE
-    checker = (checker // CFG_TRISTATE) % 2
-    return "TEGRA_PIN_ENABLE" if checker != 0 else "TEGRA_PIN_DISABLE"
+    return _enable(config_bits, CFG_TRISTATE)
 
 
 def get_einput(config_bits: int) -> str:
-    checker = config_bits & CFG_E_INPUT
-    checker = (checker // CFG_E_INPUT) % 2
-    return "TEGRA_PIN_ENABLE" if checker != 0 else "TEGRA_PIN_DISABLE"
+    return _enable(config_bits, CFG_E_INPUT)
 
 
 def get_lpdr(config_bits: int) -> str:
-    checker = config_bits & (CFG_DRV_1X | CFG_DEF_1X)
-    checker = (checker // CFG_DRV_1X) % 4
-
-    if checker > 3:
-        checker = ERR_LPDR
-
-    if checker == 0:
-        return "TEGRA_PIN_1X_DRIVER"
-    elif checker == 1:
-        return "TEGRA_PIN_2X_DRIVER"
-    elif checker == 2:
-        return "TEGRA_PIN_DEFAULT_DRIVE_1X"
-    elif checker == 3:
-        return "TEGRA_PIN_DEFAULT_DRIVE_2X"
-    else:
-        return "TEGRA_PIN_COMP"
+    return LPDR_NAMES[(config_bits >> LPDR_SHIFT) & 3]
 
 
 def get_lock(config_bits: int) -> str:
-    checker = config_bits & CFG_LOCK
-    checker = (checker // CFG_LOCK) % 2
-    return "TEGRA_PIN_ENABLE" if checker != 0 else "TEGRA_PIN_DISABLE"
+    return _enable(config_bits, CFG_LOCK)
 
 
 def get_od(config_bits: int) -> str:
-    checker = config_bits & CFG_OD
-    checker = (checker // CFG_OD) % 2
-    return "TEGRA_PIN_ENABLE" if checker != 0 else "TEGRA_PIN_DISABLE"
+    return _enable(config_bits, CFG_OD)
 
 
 def get_ddc(config_bits: int) -> int:
-    checker = config_bits & CFG_DDC
-    checker = (checker // CFG_DDC) % 2
-    return checker
+    return 1 if config_bits & CFG_DDC else 0
 
 
 def get_rcvsel(config_bits: int) -> str:
-    checker = config_bits & CFG_RCV_SEL
-    checker = (checker // CFG_RCV_SEL) % 2
-    return "TEGRA_PIN_ENABLE" if checker != 0 else "TEGRA_PIN_DISABLE"
+    return _enable(config_bits, CFG_RCV_SEL)
 
 
 def get_has_eqos(config_bits: int) -> int:
-    checker = config_bits & CFG_HAS_EQOS
-    checker = (checker // CFG_HAS_EQOS) % 2
-    return checker
+    return 1 if config_bits & CFG_HAS_EQOS else 0
 
 
 def get_eqos(config_bits: int) -> str:
-    checker = config_bits & CFG_EQOS
-    checker = (checker // CFG_EQOS) % 2
-    return "TEGRA_PIN_ENABLE" if checker != 0 else "TEGRA_PIN_DISABLE"
-
-
-def print_pinmux_dt(
-    mpio_name,
-    sfio_name,
-    mpio_config_value,
-    pin_num,
-    signal_name,
-    max_sfio_index: int,
-    max_gpio_index: int,
-    max_unused_index: int,
-) -> str:
+    return _enable(config_bits, CFG_EQOS)
+
+
+@functools.lru_cache(maxsize=None)
+def decode_config(config_bits: int) -> tuple:
     """
-    Python equivalent of VBA PrintPinmuxDT(), with extra comments using
-    pin number and signal name from columns A/B.
+    Decode every DT property from a ConfigBits mask in one call.
+
+    Returns (pull, tristate, einput, lpdr, lock, od, ddc, rcvsel,
+    has_eqos, eqos). Only a handful of distinct masks occur per sheet,
+    so results are cached.
+    """
+    return (
+        get_pull(config_bits),
+        get_tristate(config_bits),
+        get_einput(config_bits),
+        get_lpdr(config_bits),
+        get_lock(config_bits),
+        get_od(config_bits),
+        get_ddc(config_bits),
+        get_rcvsel(config_bits),
+        get_has_eqos(config_bits),
+        get_eqos(config_bits),
+    )
 
-    Arrays are 1-based: index 0 unused.
+
+@functools.lru_cache(maxsize=None)
+def config_lines(config_bits: int) -> str:
+    """
+    Render the property lines for a ConfigBits mask once; every pin that
+    shares the mask reuses the same string.
     """
+    (pull, tristate, einput, lpdr, lock, od,
+     ddc, rcvsel, has_eqos, eqos) = decode_config(config_bits)
+
+    # Optional properties, only emitted when set
+    extra = ""
+    if lock == "TEGRA_PIN_ENABLE":
+        extra += f"{QUAD_TAB}nvidia,lock = <{lock}>;\n"
+    if od == "TEGRA_PIN_ENABLE":
+        extra += f"{QUAD_TAB}nvidia,open-drain = <{od}>;\n"
+    if ddc:
+        extra += f"{QUAD_TAB}nvidia,e-io-od = <{rcvsel}>;\n"
+    if has_eqos:
+        extra += f"{QUAD_TAB}nvidia,e-lpbk = <{eqos}>;\n"
+
+    return CONFIG_TMPL.format(pull=pull, tri=tristate, ein=einput, lpdr=lpdr, extra=extra)
+
+
+# One pin row from the sheet: MPIO (C), function (AS), config bits,
+# pin number (A) and signal name (B)
+PinRec = collections.namedtuple("PinRec", "mpio func cfg pnum sig")
+
 
-    def cfg(idx: int) -> int:
-        return int(mpio_config_value[idx])
+def _emit_pin_block(out_fp, rec: PinRec):
+    """Write one pin block (with optional /* Pin <A> - <B> */ comment) to out_fp."""
+    # Optional comment: /* Pin <A> - <B> */
+    comment_parts = []
+    if rec.pnum:
+        comment_parts.append(str(rec.pnum))
+    if rec.sig:
+        comment_parts.append(rec.sig)
+    comment = (f"{TRIPLE_TAB}/* Pin " + " - ".join(comment_parts) + " */\n"
+               if comment_parts else "")
 
-    max_used_index = max_sfio_index + max_gpio_index
-    max_index = max_used_index + max_unused_index
+    out_fp.write(PIN_TMPL.format(
+        comment=comment, pin=rec.mpio, func=rec.func, config=config_lines(rec.cfg),
+    ))
 
-    lines = []
+
+def write_pinmux_dt(out_fp, used_recs, unused_recs) -> None:
+    """
+    Python equivalent of VBA PrintPinmuxDT(), with extra comments using
+    pin number and signal name from columns A/B.
+
+    used_recs go into common { ... }, unused_recs into unused_lowpower.
+    Each block is written to out_fp as soon as it is formatted, so the
+    whole DTSI is never held in memory.
+    """
+    write = out_fp.write
 
     # common { ... }
-    lines.append(f"{DOUBLE_TAB}common {{")
-    lines.append(f"{TRIPLE_TAB}/* SFIO Pin Configuration */")
-
-    current = 1
-    while current <= max_used_index:
-        pin = mpio_name[current]
-        func = sfio_name[current]
-        pnum = pin_num[current]
-        sig  = signal_name[current]
-
-        # Optional comment: /* Pin <A> - <B> */
-        comment_parts = []
-        if pnum:
-            comment_parts.append(str(pnum))
-        if sig:
-            comment_parts.append(sig)
-        if comment_parts:
-            lines.append(f"{TRIPLE_TAB}/* Pin " + " - ".join(comment_parts) + " */")
-
-        lines.append(f"{TRIPLE_TAB}{pin} {{")
-        lines.append(f'{QUAD_TAB}nvidia,pins = "{pin}";')
-        lines.append(f'{QUAD_TAB}nvidia,function = "{func}";')
-        lines.append(f"{QUAD_TAB}nvidia,pull = <{get_pull(cfg(current))}>;")
-        lines.append(f"{QUAD_TAB}nvidia,tristate = <{get_tristate(cfg(current))}>;")
-        lines.append(f"{QUAD_TAB}nvidia,enable-input = <{get_einput(cfg(current))}>;")
-        lines.append(f"{QUAD_TAB}nvidia,drv-type = <{get_lpdr(cfg(current))}>;")
-
-        if get_lock(cfg(current)) == "TEGRA_PIN_ENABLE":
-            lines.append(f"{QUAD_TAB}nvidia,lock = <{get_lock(cfg(current))}>;")
-        if get_od(cfg(current)) == "TEGRA_PIN_ENABLE":
-            lines.append(f"{QUAD_TAB}nvidia,open-drain = <{get_od(cfg(current))}>;")
-        if get_ddc(cfg(current)):
-            lines.append(f"{QUAD_TAB}nvidia,e-io-od = <{get_rcvsel(cfg(current))}>;")
-        if get_has_eqos(cfg(current)):
-            lines.append(f"{QUAD_TAB}nvidia,e-lpbk = <{get_eqos(cfg(current))}>;")
-
-        lines.append(f"{TRIPLE_TAB}}};")
-
-        if current < max_used_index:
-            lines.append("")
-
-        current += 1
-
-    lines.append(f"{DOUBLE_TAB}}};")
-    lines.append("")
+    write(f"{DOUBLE_TAB}common {{\n")
+    write(f"{TRIPLE_TAB}/* SFIO Pin Configuration */\n")
+
+    for i, rec in enumerate(used_recs):
+        if i:
+            write("\n")
+        _emit_pin_block(out_fp, rec)
+
+    write(f"{DOUBLE_TAB}}};\n")
+    write("\n")
 
     # pinmux_unused_lowpower
-    lines.append(f"\tpinmux_unused_lowpower: unused_lowpower {{")
-
-    while current <= max_index:
-        pin = mpio_name[current]
-        func = sfio_name[current]
-        pnum = pin_num[current]
-        sig  = signal_name[current]
-
-        comment_parts = []
-        if pnum:
-            comment_parts.append(str(pnum))
-        if sig:
-            comment_parts.append(sig)
-        if comment_parts:
-            lines.append(f"{TRIPLE_TAB}/* Pin " + " - ".join(comment_parts) + " */")
-
-        lines.append(f"{TRIPLE_TAB}{pin} {{")
-        lines.append(f'{QUAD_TAB}nvidia,pins = "{pin}";')
-        lines.append(f'{QUAD_TAB}nvidia,function = "{func}";')
-        lines.append(f"{QUAD_TAB}nvidia,pull = <{get_pull(cfg(current))}>;")
-        lines.append(f"{QUAD_TAB}nvidia,tristate = <{get_tristate(cfg(current))}>;")
-        lines.append(f"{QUAD_TAB}nvidia,enable-input = <{get_einput(cfg(current))}>;")
-        lines.append(f"{QUAD_TAB}nvidia,drv-type = <{get_lpdr(cfg(current))}>;")
-
-        if get_lock(cfg(current)) == "TEGRA_PIN_ENABLE":
-            lines.append(f"{QUAD_TAB}nvidia,lock = <{get_lock(cfg(current))}>;")
-        if get_od(cfg(current)) == "TEGRA_PIN_ENABLE":
-            lines.append(f"{QUAD_TAB}nvidia,open-drain = <{get_od(cfg(current))}>;")
-        if get_ddc(cfg(current)):
-            lines.append(f"{QUAD_TAB}nvidia,e-io-od = <{get_rcvsel(cfg(current))}>;")
-        if get_has_eqos(cfg(current)):
-            lines.append(f"{QUAD_TAB}nvidia,e-lpbk = <{get_eqos(cfg(current))}>;")
-
-        lines.append(f"{TRIPLE_TAB}}};")
-
-        current += 1
-        if current <= max_index:
-            lines.append("")
-
-    lines.append(f"{DOUBLE_TAB}}};")
-    lines.append("")
-    lines.append(f"{DOUBLE_TAB}drive_default: drive {{")
-    lines.append(f"{DOUBLE_TAB}}};")
-
-    return "\n".join(lines) + "\n"
+    write(f"\tpinmux_unused_lowpower: unused_lowpower {{\n")
+
+    for i, rec in enumerate(unused_recs):
+        if i:
+            write("\n")
+        _emit_pin_block(out_fp, rec)
+
+    write(f"{DOUBLE_TAB}}};\n")
+    write("\n")
+    write(f"{DOUBLE_TAB}drive_default: drive {{\n")
+    write(f"{DOUBLE_TAB}}};\n")
 
 
 
@@ -270,105 +261,308 @@ def col_to_idx_1b(col_letters: str) -> int:
             acc = acc * 26 + (ord(ch) - ord("A") + 1)
     return acc
 
+COL_LETTERS = string.ascii_uppercase
+
 COL_A_PINNUM = col_to_idx_1b("A")
 COL_B_SIGNAL = col_to_idx_1b("B")
 COL_C_MPIO   = col_to_idx_1b("C")
 
-ASSUME_FIELDS = {
-    "function"     : "AS",
-    "direction"    : "AT",
-    "pull_cfg"     : "AU",
-    "enable-input" : "AV",
-    "drv-enable"   : "AX",
+ASSUME_COLS = {
+    "function"     : col_to_idx_1b("AS"),
+    "direction"    : col_to_idx_1b("AT"),
+    "pull_cfg"     : col_to_idx_1b("AU"),
+    "enable-input" : col_to_idx_1b("AV"),
+    "drv-enable"   : col_to_idx_1b("AX"),
 }
-USED_COL_LETTERS = list(ASSUME_FIELDS.values())
 
+# Columns read from the sheet; a row is a list indexed by COL_POS[col]
+READ_COLS = (COL_A_PINNUM, COL_B_SIGNAL, COL_C_MPIO, *ASSUME_COLS.values())
+COL_POS = {col: pos for pos, col in enumerate(READ_COLS)}
+POS_PINNUM = COL_POS[COL_A_PINNUM]
+POS_SIGNAL = COL_POS[COL_B_SIGNAL]
+POS_MPIO   = COL_POS[COL_C_MPIO]
+ASSUME_POS = {field: COL_POS[col] for field, col in ASSUME_COLS.items()}
+
+
+# Fully qualified "{ns}local" tags, interned so comparisons against the
+# parser's tag strings usually succeed on identity
+NS_MAIN_URI = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_MAIN = f"{{{NS_MAIN_URI}}}"
+NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+NS_DOC_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+SHEETS_SHEET_PATH = f"{NS_MAIN}sheets/{NS_MAIN}sheet"
+REL_TAG        = sys.intern(f"{NS_PKG_REL}Relationship")
+REL_ID_ATTR    = sys.intern(f"{NS_DOC_REL}id")
+
+# pyexpat with namespace_separator="}" reports names as "uri}local"
+X_ROW = sys.intern(f"{NS_MAIN_URI}}}row")
+X_C   = sys.intern(f"{NS_MAIN_URI}}}c")
+X_V   = sys.intern(f"{NS_MAIN_URI}}}v")
+X_T   = sys.intern(f"{NS_MAIN_URI}}}t")
+
+# Large (de)compressed reads from xlsx members
+ZIP_READ_BUFFER = 1 << 16
+
+
+class _SharedStringsHandler(xml.sax.handler.ContentHandler):
+    """
+    SAX handler collecting the text of every <si> in sharedStrings.xml.
+
+    All <t> runs inside an <si> (rich text) are concatenated; no tree is
+    built. The list is presized from <sst uniqueCount=...> and each string
+    is interned, since many cells repeat the same few values.
+    """
 
-def _st(tag: str) -> str:
-    return tag.split("}", 1)[-1] if "}" in tag else tag
+    def __init__(self):
+        super().__init__()
+        self.strings = []
+        self.count = 0
+        self._parts = None
+        self._in_t = False
+
+    def startElementNS(self, name, qname, attrs):
+        uri, local = name
+        if uri != NS_MAIN_URI:
+            return
+        if local == "si":
+            self._parts = []
+        elif local == "t" and self._parts is not None:
+            self._in_t = True
+        elif local == "sst":
+            unique = attrs.get((None, "uniqueCount"), "")
+            if unique.isdecimal():
+                self.strings = [None] * int(unique)
+
+    def endElementNS(self, name, qname):
+        uri, local = name
+        if uri != NS_MAIN_URI:
+            return
+        if local == "si":
+            text = sys.intern("".join(self._parts))
+            if self.count < len(self.strings):
+                self.strings[self.count] = text
+            else:
+                self.strings.append(text)
+            self.count += 1
+            self._parts = None
+        elif local == "t":
+            self._in_t = False
+
+    def characters(self, content):
+        if self._in_t:
+            self._parts.append(content)
+
+
+def _open_member(z: zipfile.ZipFile, name: str):
+    """Open a zip member for streaming, read in ZIP_READ_BUFFER chunks."""
+    return io.BufferedReader(z.open(name), buffer_size=ZIP_READ_BUFFER)
+
+
+# Fast path for workbook.xml / workbook.xml.rels: pick the few attributes
+# we need out of the raw bytes instead of building an element tree.
+_SHEET_TAG_RE = re.compile(rb"<sheet\s[^>]*>")
+_REL_TAG_RE   = re.compile(rb"<Relationship\s[^>]*>")
+_ATTR_RE      = re.compile(rb'([\w:]+)="([^"]*)"')
+
+
+def _sheet_target_fast(wb_data: bytes, rels_data: bytes):
+    """
+    Return the rels Target for SHEET_NAME via regex, or None when the
+    files don't look like the plain Excel layout (other prefixes, quoting
+    or escaped characters); the caller then falls back to ElementTree.
+    """
+    rid = None
+    for tag in _SHEET_TAG_RE.findall(wb_data):
+        attrs = dict(_ATTR_RE.findall(tag))
+        nm = attrs.get(b"name")
+        if nm is not None and b"&" not in nm and nm.decode("utf-8") == SHEET_NAME:
+            rid = attrs.get(b"r:id")
+            break
+    if rid is None:
+        return None
+
+    for tag in _REL_TAG_RE.findall(rels_data):
+        attrs = dict(_ATTR_RE.findall(tag))
+        if attrs.get(b"Id") == rid:
+            target = attrs.get(b"Target")
+            if target is None or b"&" in target:
+                return None
+            return target.decode("utf-8")
+    return None
+
+
+def _sheet_target_et(wb_data: bytes, rels_data: bytes) -> str:
+    """Return the rels Target for SHEET_NAME using ElementTree."""
+    wb_xml = ET.fromstring(wb_data)
+    name_to_rid = {}
+    for s in wb_xml.findall(SHEETS_SHEET_PATH):
+        nm = s.attrib.get("name")
+        rid = s.attrib.get(REL_ID_ATTR)
+        if nm and rid:
+            name_to_rid[nm] = rid
+
+    if SHEET_NAME not in name_to_rid:
+        raise SystemExit(f"Sheet '{SHEET_NAME}' not found. Available: {list(name_to_rid.keys())}")
+
+    rels = ET.fromstring(rels_data)
+    rid_to_target = {
+        r.attrib["Id"]: r.attrib["Target"]
+        for r in rels.findall(REL_TAG)
+    }
+
+    return rid_to_target[name_to_rid[SHEET_NAME]]
+
+
+def read_sheet_xml(z: zipfile.ZipFile):
+    """Return (sheet_member_name, shared_strings_tuple) for SHEET_NAME."""
+    wb_data = z.read("xl/workbook.xml")
+    rels_data = z.read("xl/_rels/workbook.xml.rels")
+    try:
+        target = _sheet_target_fast(wb_data, rels_data)
+    except UnicodeDecodeError:
+        target = None
+    if target is None:
+        target = _sheet_target_et(wb_data, rels_data)
+
+    shared = ()
+    if "xl/sharedStrings.xml" in z.namelist():
+        handler = _SharedStringsHandler()
+        parser = xml.sax.make_parser()
+        parser.setFeature(xml.sax.handler.feature_namespaces, True)
+        parser.setContentHandler(handler)
+        with _open_member(z, "xl/sharedStrings.xml") as fp:
+            parser.parse(fp)
+        shared = tuple(handler.strings[:handler.count])
+
+    return f"xl/{target}", shared
+
+
+class _StopSheet(Exception):
+    """Raised from the sheet handlers once past row_max to end the parse."""
+
+
+class _SheetCellsHandler:
+    """
+    pyexpat callbacks filling rows[row - row_min][pos] from a worksheet
+    stream. No elements are built; only wanted cells keep their text.
+    """
 
+    def __init__(self, cols_1b, row_min: int, row_max: int, shared_strings):
+        self.col_pos = {col: pos for pos, col in enumerate(cols_1b)}
+        self.rows = [[None] * len(self.col_pos) for _ in range(row_max - row_min + 1)]
+        self.row_min = row_min
+        self.row_max = row_max
+        self.shared_strings = shared_strings
+        self._col_cache = {}
+        self._skip_row = False
+        self._cell = None      # (row index, pos, t) of the wanted cell being read
+        self._text = None      # text parts of its <v> (or inline <t>)
+        self._in_text = False
+
+    def start(self, name, attrs):
+        if name == X_C:
+            if self._skip_row:
+                return
+            r = attrs.get("r")  # e.g., "AS13"
+            if not r:
+                return
+            # Split "AS13" into "AS" / "13" without regex; each distinct
+            # column letter prefix is mapped to its position (or -1 if
+            # not wanted) once
+            digits = r.lstrip(COL_LETTERS)
+            n_letters = len(r) - len(digits)
+            if not n_letters or not digits.isdecimal():
+                return
+            letters = r[:n_letters]
+            pos = self._col_cache.get(letters)
+            if pos is None:
+                pos = self._col_cache[letters] = self.col_pos.get(col_to_idx_1b(letters), -1)
+            if pos < 0:
+                return
+            row = int(digits)
+            if row > self.row_max:
+                # Cells are stored row-major, nothing further is wanted
+                raise _StopSheet
+            if row < self.row_min:
+                return
+            t = attrs.get("t")
+            if t == "e":  # error cells (#N/A, #REF!, ...) read as empty
+                return
+            self._cell = (row - self.row_min, pos, t)
+
+        elif name == X_ROW:
+            # <row r="N"> is optional; without it fall back to the
+            # per-cell checks above
+            row_s = attrs.get("r")
+            if row_s and row_s.isdecimal():
+                row = int(row_s)
+                if row > self.row_max:
+                    raise _StopSheet
+                self._skip_row = row < self.row_min
+            else:
+                self._skip_row = False
+
+        elif self._cell is not None:
+            # <v> holds the value; inline strings keep theirs in <is><t>
+            if name == (X_T if self._cell[2] == "inlineStr" else X_V):
+                if self._text is None:
+                    self._text = []
+                self._in_text = True
+
+    def end(self, name):
+        if name == X_C:
+            if self._cell is not None and self._text is not None:
+                row_idx, pos, t = self._cell
+                v = "".join(self._text) or None
+                if v is not None and t == "s":
+                    try:
+                        v = self.shared_strings[int(v)]
+                    except Exception:
+                        pass
+                self.rows[row_idx][pos] = v
+            self._cell = None
+            self._text = None
+        elif self._in_text and (name == X_V or name == X_T):
+            self._in_text = False
+
+    def chars(self, data):
+        if self._in_text:
+            self._text.append(data)
+
+
+def read_cells(xlsx_path: Path, cols_1b, row_min: int, row_max: int):
+    """
+    Return rows[row - row_min][pos] = value for rows row_min..row_max of
+    SHEET_NAME, where pos is the index of the column in cols_1b. Missing
+    cells are None.
 
-def read_sheet_xml(xlsx_path: Path):
-    """Return (sheet_xml_root, shared_strings_list) for SHEET_NAME."""
+    The worksheet is streamed through pyexpat callbacks in a single pass,
+    without building an element tree. Rows before row_min are skipped
+    whole, and parsing stops at the first row past row_max.
+    """
     with zipfile.ZipFile(xlsx_path) as z:
-        wb_xml = ET.fromstring(z.read("xl/workbook.xml"))
-        name_to_rid = {}
-        for s in wb_xml.iter():
-            if _st(s.tag) == "sheet":
-                nm = s.attrib.get("name")
-                rid = s.attrib.get(
-                    "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
-                )
-                if nm and rid:
-                    name_to_rid[nm] = rid
-
-        if SHEET_NAME not in name_to_rid:
-            raise SystemExit(f"Sheet '{SHEET_NAME}' not found. Available: {list(name_to_rid.keys())}")
-
-        rels = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
-        rid_to_target = {
-            r.attrib["Id"]: r.attrib["Target"]
-            for r in rels.iter()
-            if _st(r.tag) == "Relationship"
-        }
-
-        target = rid_to_target[name_to_rid[SHEET_NAME]]
-        sheet_xml = ET.fromstring(z.read(f"xl/{target}"))
-
-        shared = []
-        if "xl/sharedStrings.xml" in z.namelist():
-            sst = ET.fromstring(z.read("xl/sharedStrings.xml"))
-            for si in sst.iter():
-                if _st(si.tag) == "si":
-                    parts = []
-                    for t in si.iter():
-                        if _st(t.tag) == "t" and t.text is not None:
-                            parts.append(t.text)
-                    shared.append("".join(parts))
-
-    return sheet_xml, shared
-
-
-def read_cells(sheet_xml, shared_strings, col_filter_1b=None, row_min=None, row_max=None):
-    """Return dict[(row, col_idx1)] = value for selected region."""
-    vals = {}
-    for c in sheet_xml.iter():
-        if _st(c.tag) != "c":
-            continue
-        r = c.attrib.get("r")  # e.g., "AS13"
-        if not r:
-            continue
-        m = re.match(r"([A-Z]+)(\d+)$", r)
-        if not m:
-            continue
-        col_letters, row_s = m.group(1), m.group(2)
-        row = int(row_s)
-        col_idx = col_to_idx_1b(col_letters)
+        member, shared_strings = read_sheet_xml(z)
 
-        if row_min and row < row_min:
-            continue
-        if row_max and row > row_max:
-            continue
-        if col_filter_1b and col_idx not in col_filter_1b:
-            continue
+        handler = _SheetCellsHandler(cols_1b, row_min, row_max, shared_strings)
+        parser = expat.ParserCreate(namespace_separator="}")
+        parser.buffer_text = True
+        parser.StartElementHandler = handler.start
+        parser.EndElementHandler = handler.end
+        parser.CharacterDataHandler = handler.chars
 
-        t = c.attrib.get("t")
-        v_node = c.find("{*}v")
-        v = None
-        if v_node is not None and v_node.text is not None:
-            v = v_node.text
-            if t == "s":
-                try:
-                    v = shared_strings[int(v)]
-                except Exception:
-                    pass
-        else:
-            is_node = c.find("{*}is/{*}t")
-            if is_node is not None and is_node.text is not None:
-                v = is_node.text
-        vals[(row, col_idx)] = v
+        with _open_member(z, member) as fp:
+            try:
+                while True:
+                    chunk = fp.read(ZIP_READ_BUFFER)
+                    if not chunk:
+                        break
+                    parser.Parse(chunk, False)
+                parser.Parse(b"", True)
+            except _StopSheet:
+                pass
 
-    return vals
+    return handler.rows
 
 
 
@@ -380,56 +574,86 @@ def _as_str(v):
     return str(v).strip()
 
 
-def encode_config_bits_for_row(row: int, used_cells) -> int:
-    """
-    Build the integer ConfigBits mask from AS–AX for this row.
-
-    AT: Not Assigned / Input / Output / N/A
-    AU: Z / Int PU / Int PD / Drive 0 / Drive 1 / N/A
-    AV: Yes / No / blank  (input enable hint)
-    AX: Enable / Disable
-    """
+def _au_bits(au_s: str) -> int:
+    """Pull and drive-strength bits for an AU value (case-insensitive)."""
+    au_s = au_s.lower()
     bits = 0
 
-    def col(letter: str):
-        return used_cells.get((row, col_to_idx_1b(letter)))
-
     #  internal pull from AU 
-    au_s = _as_str(col(ASSUME_FIELDS["pull_cfg"])).lower()
-
     if "int pu" in au_s:
         bits |= CFG_PULL_UP
     elif "int pd" in au_s:
         bits |= CFG_PULL_DOWN
     # "z" / "n/a" → no pull bits set
 
-    #  direction + input-enable + tristate from AT / AV / AX 
-    at_s = _as_str(col(ASSUME_FIELDS["direction"])).lower()
-    av_s = _as_str(col(ASSUME_FIELDS["enable-input"])).lower()
-    ax_s = _as_str(col(ASSUME_FIELDS["drv-enable"])).lower()
+    #  drive strength from AU ("Drive 0" / "Drive 1") 
+    if "drive 0" in au_s:
+        bits |= CFG_DRV_1X        # 1X driver
+    elif "drive 1" in au_s:
+        bits |= CFG_DRV_1X | CFG_DEF_1X
+
+    return bits
+
 
-    is_input  = at_s == "input"
-    is_output = at_s == "output"
+def _at_dir(at_s: str) -> str:
+    at_s = at_s.lower()
     # "not assigned" / "n/a" are treated as unused by classifier
+    return at_s if at_s in ("input", "output") else ""
+
+
+def _av_bits(av_s: str) -> int:
+    return CFG_E_INPUT if av_s.lower() == "yes" else 0
+
+
+def _ax_bits(ax_s: str) -> int:
+    return CFG_TRISTATE if ax_s.lower() == "disable" else 0
+
+
+# Exact template spellings resolve with one dict lookup; any other value
+# goes through the case-insensitive classifier once and is remembered.
+AU_BITS = {v: _au_bits(v) for v in ("Z", "Int PU", "Int PD", "Drive 0", "Drive 1", "N/A", "")}
+AT_DIR  = {v: _at_dir(v) for v in ("Not Assigned", "Input", "Output", "N/A", "")}
+AV_BITS = {v: _av_bits(v) for v in ("Yes", "No", "")}
+AX_BITS = {v: _ax_bits(v) for v in ("Enable", "Disable", "")}
 
-    if is_input:
+
+# AT values (lowercased) that mark a pin as unused
+UNUSED_DIRECTIONS = frozenset({"not assigned", "n/a"})
+
+
+def _lookup(table: dict, raw: str, classify):
+    val = table.get(raw)
+    if val is None:
+        val = table[raw] = classify(raw)
+    return val
+
+
+def encode_config_bits_for_row(row_vals, pos=ASSUME_POS) -> int:
+    """
+    Build the integer ConfigBits mask from AS–AX for this row, as returned
+    by read_cells and indexed through pos.
+
+    AT: Not Assigned / Input / Output / N/A
+    AU: Z / Int PU / Int PD / Drive 0 / Drive 1 / N/A
+    AV: Yes / No / blank  (input enable hint)
+    AX: Enable / Disable
+    """
+    #  internal pull + drive strength from AU 
+    bits = _lookup(AU_BITS, _as_str(row_vals[pos["pull_cfg"]]), _au_bits)
+
+    #  direction + input-enable + tristate from AT / AV / AX 
+    direction = _lookup(AT_DIR, _as_str(row_vals[pos["direction"]]), _at_dir)
+
+    if direction == "input":
         # Input-only: tristated, input enabled
         bits |= CFG_TRISTATE
         bits |= CFG_E_INPUT
-    elif is_output:
+    elif direction == "output":
         # Output-only: driving, input disabled by default
-        if av_s == "yes":
-            bits |= CFG_E_INPUT
+        bits |= _lookup(AV_BITS, _as_str(row_vals[pos["enable-input"]]), _av_bits)
 
     # If AX == "disable", force tristate regardless of AT
-    if ax_s == "disable":
-        bits |= CFG_TRISTATE
-
-    #  drive strength from AU ("Drive 0" / "Drive 1") 
-    if "drive 0" in au_s:
-        bits |= CFG_DRV_1X        # 1X driver
-    elif "drive 1" in au_s:
-        bits |= CFG_DRV_1X | CFG_DEF_1X
+    bits |= _lookup(AX_BITS, _as_str(row_vals[pos["drv-enable"]]), _ax_bits)
 
     # DDC / RCVSEL / EQOS are not used in this Thor template
     return bits
@@ -446,33 +670,26 @@ def main():
     if not xlsx.exists():
         raise SystemExit(f"File not found: {xlsx}")
 
-    sheet_xml, shared = read_sheet_xml(xlsx)
-
-    # Read pin identity (A,B,C) for data rows
-    pin_cols = {COL_A_PINNUM, COL_B_SIGNAL, COL_C_MPIO}
-    pin_cells = read_cells(sheet_xml, shared, col_filter_1b=pin_cols,
-                           row_min=ROW_DATA_START, row_max=ROW_DATA_END)
+    # Read pin identity (A,B,C) and AS–AX for config in one pass
+    rows = read_cells(xlsx, READ_COLS, ROW_DATA_START, ROW_DATA_END)
 
-    # Read AS–AX for config
-    used_cols_1b = {col_to_idx_1b(c) for c in USED_COL_LETTERS}
-    used_cells = read_cells(sheet_xml, shared, col_filter_1b=used_cols_1b,
-                            row_min=ROW_DATA_START, row_max=ROW_DATA_END)
+    pos_func = ASSUME_POS["function"]
+    pos_dir = ASSUME_POS["direction"]
 
-    def get_used(row, letter):
-        return used_cells.get((row, col_to_idx_1b(letter)))
+    used_recs = []
+    unused_recs = []
 
-    used_rows = []
-    unused_rows = []
-
-    for r in range(ROW_DATA_START, ROW_DATA_END + 1):
-        mpio = pin_cells.get((r, COL_C_MPIO))
-        mpio_str = _as_str(mpio)
-        if not mpio_str:
+    for row_vals in rows:
+        mpio = _as_str(row_vals[POS_MPIO])
+        if not mpio:
             continue
 
-        func = _as_str(get_used(r, ASSUME_FIELDS["function"]))
+        func = _as_str(row_vals[pos_func])
         func_lower = func.lower()
-        dir_s = _as_str(get_used(r, ASSUME_FIELDS["direction"])).lower()
+        dir_s = _as_str(row_vals[pos_dir]).lower()
+        cfg_bits = encode_config_bits_for_row(row_vals)
+        pnum = _as_str(row_vals[POS_PINNUM])
+        sig  = _as_str(row_vals[POS_SIGNAL])
 
         # Unused rules:
         #  - no function at all
@@ -480,73 +697,17 @@ def main():
         #  - direction is "not assigned" or "n/a"
         if (not func
                 or func_lower.startswith("unused")
-                or dir_s in ("not assigned", "n/a")):
-            unused_rows.append(r)
+                or dir_s in UNUSED_DIRECTIONS):
+            unused_recs.append(PinRec(mpio, func if func else "unused", cfg_bits, pnum, sig))
         else:
-            used_rows.append(r)
-
-    total_used = len(used_rows)
-    total_unused = len(unused_rows)
-    total = total_used + total_unused
-
-    # 1-based arrays for VBA-style logic
-    mpio_name   = [""  for _ in range(total + 1)]
-    sfio_name   = [""  for _ in range(total + 1)]
-    mpio_cfg    = [0   for _ in range(total + 1)]
-    pin_num     = [""  for _ in range(total + 1)]
-    signal_name = [""  for _ in range(total + 1)]
-
-    def get_pin(row, col_idx):
-        return pin_cells.get((row, col_idx))
-
-    idx = 1
-    # Fill used pins first (common { ... })
-    for r in used_rows:
-        mpio = _as_str(get_pin(r, COL_C_MPIO))
-        func = _as_str(get_used(r, ASSUME_FIELDS["function"]))
-        cfg_bits = encode_config_bits_for_row(r, used_cells)
-        pnum = _as_str(get_pin(r, COL_A_PINNUM))
-        sig  = _as_str(get_pin(r, COL_B_SIGNAL))
-
-        mpio_name[idx]   = mpio
-        sfio_name[idx]   = func
-        mpio_cfg[idx]    = cfg_bits
-        pin_num[idx]     = pnum
-        signal_name[idx] = sig
-        idx += 1
-
-    # Then unused_lowpower pins
-    for r in unused_rows:
-        mpio = _as_str(get_pin(r, COL_C_MPIO))
-        func = _as_str(get_used(r, ASSUME_FIELDS["function"]))
-        cfg_bits = encode_config_bits_for_row(r, used_cells)
-        pnum = _as_str(get_pin(r, COL_A_PINNUM))
-        sig  = _as_str(get_pin(r, COL_B_SIGNAL))
-
-        mpio_name[idx]   = mpio
-        sfio_name[idx]   = func if func else "unused"
-        mpio_cfg[idx]    = cfg_bits
-        pin_num[idx]     = pnum
-        signal_name[idx] = sig
-        idx += 1
-
-    max_sfio_index   = total_used
-    max_gpio_index   = 0             # no explicit SFIO vs GPIO split here
-    max_unused_index = total_unused
-
-    dtsi_text = print_pinmux_dt(
-        mpio_name,
-        sfio_name,
-        mpio_cfg,
-        pin_num,
-        signal_name,
-        max_sfio_index,
-        max_gpio_index,
-        max_unused_index,
-    )
+            used_recs.append(PinRec(mpio, func, cfg_bits, pnum, sig))
+
+    total_used = len(used_recs)
+    total_unused = len(unused_recs)
 
     out_path = Path(args.out)
-    out_path.write_text(dtsi_text, encoding="utf-8")
+    with out_path.open("w", encoding="utf-8", buffering=1 << 20) as out_fp:
+        write_pinmux_dt(out_fp, used_recs, unused_recs)
     print(f"Wrote {out_path} with {total_used} used pins and {total_unused} unused pins.")
 
 